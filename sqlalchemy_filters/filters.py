@@ -12,6 +12,7 @@ from .models import (
     Field,
     auto_join,
     get_model_from_spec,
+    get_query_models,
     get_relationship_models,
     should_filter_outer_join_relationship,
 )
@@ -98,12 +99,12 @@ class Filter(object):
             else (models, list())
         )
 
-    def format_for_sqlalchemy(self, query, default_model):
+    def format_for_sqlalchemy(self, query, default_model, models=None):
         filter_spec = self.filter_spec
         operator = self.operator
         value = self.value
 
-        model = get_model_from_spec(filter_spec, query, default_model)
+        model = get_model_from_spec(filter_spec, query, default_model, models)
 
         function = operator.function
         arity = operator.arity
@@ -136,10 +137,10 @@ class BooleanFilter(object):
 
         return models_inner_join, models_outer_join
 
-    def format_for_sqlalchemy(self, query, default_model):
+    def format_for_sqlalchemy(self, query, default_model, models=None):
         return self.function(
             *[
-                filter.format_for_sqlalchemy(query, default_model)
+                filter.format_for_sqlalchemy(query, default_model, models)
                 for filter in self.filters
             ]
         )
@@ -246,8 +247,9 @@ def apply_filters(model, query, filter_spec, do_auto_join=True):
     if do_auto_join:
         query = auto_join(query, inner_join_models, outer_join_models)
 
+    models = get_query_models(query) if filters else None
     sqlalchemy_filters = [
-        filter.format_for_sqlalchemy(query, model) for filter in filters
+        filter.format_for_sqlalchemy(query, model, models) for filter in filters
     ]
 
     if sqlalchemy_filters:
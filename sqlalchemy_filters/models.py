@@ -3,25 +3,48 @@ from sqlalchemy.exc import InvalidRequestError
 from sqlalchemy.orm import mapperlib
 from sqlalchemy.inspection import inspect
 from sqlalchemy.util import symbol
+import re
 import types
+from functools import lru_cache, wraps
+from weakref import WeakKeyDictionary, WeakValueDictionary
 
 from .exceptions import BadQuery, FieldNotFound, BadSpec
 
 
+def _version_tuple(version):
+    """Numeric release components of `version`, e.g. ``(1, 4, 0)``."""
+    return tuple(int(part) for part in re.findall(r"\d+", version)[:3])
+
+
+_SA_VERSION = _version_tuple(sqlalchemy_version)
+_SA_LT_11 = _SA_VERSION < (1, 1)
+_IS_SA_14 = _SA_VERSION >= (1, 4)
+
+_HYBRID_PROPERTY = symbol("HYBRID_PROPERTY")
+_HYBRID_METHOD = symbol("HYBRID_METHOD")
+_HYBRID_EXTENSION_TYPES = (_HYBRID_PROPERTY, _HYBRID_METHOD)
+_ONETOMANY = symbol("ONETOMANY")
+
+
+@lru_cache(maxsize=None)
 def sqlalchemy_version_lt(version):
     """compares sqla version < version"""
 
-    return tuple(sqlalchemy_version.split(".")) < tuple(version.split("."))
+    return _SA_VERSION < _version_tuple(version)
 
 
 class Field(object):
 
-    def __init__(self, model, field_name):
+    def __init__(self, model, field_name, column=None):
         self.model = model
         self.field_name = field_name
+        # Optional column already looked up by the caller, e.g. `Sort`.
+        self.column = column
 
     def get_sqlalchemy_field(self):
-        sqlalchemy_field = get_nested_column(self.model, self.field_name)
+        sqlalchemy_field = self.column
+        if sqlalchemy_field is None:
+            sqlalchemy_field = get_nested_column(self.model, self.field_name)
 
         if sqlalchemy_field is None:
             raise FieldNotFound(
@@ -36,92 +59,141 @@ class Field(object):
         return sqlalchemy_field
 
 
-def _is_hybrid_property(orm_descriptor):
-    return orm_descriptor.extension_type == symbol("HYBRID_PROPERTY")
+def _weak_key_cache(function):
+    """Cache the results of the single-argument `function` without keeping
+    the argument alive, so that dynamically created mappings can still be
+    garbage collected. Cached results must not refer back to the argument.
+    Passing ``refresh=True`` recomputes the cached result.
+    """
+    cache = WeakKeyDictionary()
+
+    @wraps(function)
+    def wrapper(key, refresh=False):
+        if not refresh:
+            try:
+                return cache[key]
+            except KeyError:
+                pass
+        result = cache[key] = function(key)
+        return result
+
+    return wrapper
+
+
+@_weak_key_cache
+def _hybrid_fields(model):
+    """Return the names of the hybrid properties and methods of `model`.
+
+    Only computed for models whose own fields are looked up, and only when
+    the field is not a column or composite.
+    """
+    return frozenset(
+        key
+        for key, item in inspect(model).all_orm_descriptors.items()
+        if item.extension_type in _HYBRID_EXTENSION_TYPES
+    )
+
+
+def walk_relationships(model, field):
+    """Follow the relationships named by all but the last part of `field`,
+    a dotted path or a sequence of its parts.
+
+    :returns:
+        A 2-tuple with the relationship attributes followed, in join order,
+        and the model reached, which is `None` if a relationship is missing.
+    """
+    parts = field.split(".") if isinstance(field, str) else field
+
+    # Order in which joins are applied to the query matters so use list.
+    relationships = list()
+
+    for part in parts[:-1]:
+        model_relationships = inspect(model).relationships
+        if part not in model_relationships:
+            return relationships, None
+        relationship = model_relationships[part]
+        relationships.append(relationship.class_attribute)
+        model = relationship.mapper.class_
+
+    return relationships, model
+
 
+def get_model_column(model, name):
+    """Return the column, composite or hybrid attribute `name` of `model`
+    itself, or `None` if it has none.
+    """
+    mapper = inspect(model)
+    if (
+        name in mapper.columns
+        or name in mapper.composites
+        or name in _hybrid_fields(model)
+        # hybrids may have been added to the model since they were cached
+        or name in _hybrid_fields(model, refresh=True)
+    ):
+        return getattr(model, name)
 
-def _is_hybrid_method(orm_descriptor):
-    return orm_descriptor.extension_type == symbol("HYBRID_METHOD")
+    return None
 
 
 def get_relationship_models(model, field):
-    parts = field.split(".")
+    return walk_relationships(model, field)[0]
+
+
+def resolve_nested_field(model, field):
+    """Resolve `field` on `model` in a single walk over its relationships.
 
-    if len(parts) > 1:
-        # Order in which joins are applied to the query matters so use list.
-        relationships = list()
+    `field` may be a dotted path or a sequence of its parts.
 
-        # Find all relationships.
-        for i in range(1, len(parts)):
-            if (
-                column := find_nested_relationship_model(inspect(model), parts[0:i])
-            ) is not None:
-                relationships.append(column.class_attribute)
+    :returns:
+        A 2-tuple with the relationships leading up to the field, as
+        returned by :func:`get_relationship_models`, and the field itself, as
+        returned by :func:`get_nested_column`.
+    """
+    parts = field.split(".") if isinstance(field, str) else field
 
-        return relationships
+    relationships, model = walk_relationships(model, parts)
+    column = None if model is None else get_model_column(model, parts[-1])
 
-    return list()
+    return relationships, column
 
 
 def should_filter_outer_join_relationship(operator):
     return operator == "is_null"
 
 
+@_weak_key_cache
+def _should_outer_join(relationship_property):
+    """Whether sorting on `relationship_property` requires an outer join, as
+    it may have no related rows.
+    """
+    return relationship_property.direction is _ONETOMANY or any(
+        column.nullable for column in relationship_property.local_columns
+    )
+
+
 def should_sort_outer_join_relationship(models):
-    for rel_model in models:
-        if rel_model.prop.direction == symbol("ONETOMANY"):
-            return True
-        elif any(column.nullable for column in rel_model.prop.local_columns):
-            return True
-    return False
+    return any(_should_outer_join(rel_model.prop) for rel_model in models)
 
 
 def find_nested_relationship_model(mapper, field):
-    parts = field if isinstance(field, list) else field.split(".")
+    parts = field.split(".") if isinstance(field, str) else field
 
-    if (part := parts[0]) in mapper.relationships:
-        related_field = mapper.relationships[part]
-        return (
-            find_nested_relationship_model(related_field.mapper, ".".join(parts[1::]))
-            if len(parts) > 1
-            else related_field
-        )
-    else:
-        return None
+    related_field = None
+    for part in parts:
+        relationships = mapper.relationships
+        if part not in relationships:
+            return None
+        related_field = relationships[part]
+        mapper = related_field.mapper
+
+    return related_field
 
 
 def get_nested_column(model, field):
     """
     Searches through relationships to find the requested field.
     """
-    parts = field if isinstance(field, list) else field.split(".")
-
-    mapper = inspect(model)
-    orm_descriptors = mapper.all_orm_descriptors
-    hybrid_fields = [
-        key
-        for key, item in orm_descriptors.items()
-        if _is_hybrid_property(item) or _is_hybrid_method(item)
-    ]
-
-    # Search in own model fields
-    if len(parts) == 1:
-        if (
-            field in mapper.columns
-            or field in mapper.composites
-            or field in hybrid_fields
-        ):
-            return getattr(model, field)
-        else:
-            return None
-
-    # Search in relationships.
-    if (part := parts[0]) in mapper.relationships:
-        return get_nested_column(
-            getattr(model, part).property.entity.class_, ".".join(parts[1::])
-        )
-    else:
-        return None
+    return resolve_nested_field(model, field)[1]
 
 
 def get_model_class_by_name(registry, name):
@@ -131,14 +203,22 @@ def get_model_class_by_name(registry, name):
             return cls
 
 
+# Mapped classes by table, filled in from all registries on a lookup miss.
+_table_to_class = WeakValueDictionary()
+
+
 def get_model_from_table(table):  # pragma: no_cover_sqlalchemy_lt_1_4
     """Resolve model class from table object"""
 
-    for registry in mapperlib._all_registries():
-        for mapper in registry.mappers:
-            if table in mapper.tables:
-                return mapper.class_
-    return None
+    model_class = _table_to_class.get(table)
+    if model_class is None:
+        # Mappers may have been registered since the index was last filled.
+        for registry in mapperlib._all_registries():
+            for mapper in registry.mappers:
+                for mapper_table in mapper.tables:
+                    _table_to_class.setdefault(mapper_table, mapper.class_)
+        model_class = _table_to_class.get(table)
+    return model_class
 
 
 def get_query_models(query):
@@ -150,6 +230,13 @@ def get_query_models(query):
     :returns:
         A dictionary with all the models included in the query.
     """
+    return _get_query_models_and_set(query)[0]
+
+
+def _get_query_models_and_set(query):
+    """Get models from query, both by name and as a new set of classes for
+    membership tests, which callers may update as they join more models.
+    """
     models = [
         col_desc["entity"]
         for col_desc in query.column_descriptions
@@ -157,40 +244,61 @@ def get_query_models(query):
     ]
 
     # account joined entities
-    if sqlalchemy_version_lt("1.4"):  # pragma: no_cover_sqlalchemy_gte_1_4
-        models.extend(mapper.class_ for mapper in query._join_entities)
-    else:  # pragma: no_cover_sqlalchemy_lt_1_4
-        try:
-            models.extend(
-                mapper.class_ for mapper in query._compile_state()._join_entities
-            )
-        except InvalidRequestError:
-            # query might not contain columns yet, hence cannot be compiled
-            # try to infer the models from various internals
-            for table_tuple in query._setup_joins + query._legacy_setup_joins:
-                model_class = get_model_from_table(table_tuple[0])
-                if model_class:
-                    models.append(model_class)
+    models.extend(_get_joined_models(query))
 
     # account also query.select_from entities
-    model_class = None
-    if sqlalchemy_version_lt("1.4"):  # pragma: no_cover_sqlalchemy_gte_1_4
-        if query._select_from_entity:
-            model_class = (
-                query._select_from_entity
-                if sqlalchemy_version_lt("1.1")
-                else query._select_from_entity.class_
-            )
-    else:  # pragma: no_cover_sqlalchemy_lt_1_4
-        if query._from_obj:
-            model_class = get_model_from_table(query._from_obj[0])
+    model_class = _get_select_from_model(query)
     if model_class and (model_class not in models):
         models.append(model_class)
 
-    return {model.__name__: model for model in models}
+    return {model.__name__: model for model in models}, set(models)
+
+
+def _get_joined_models_1_3(query):  # pragma: no_cover_sqlalchemy_gte_1_4
+    return [mapper.class_ for mapper in query._join_entities]
 
 
-def get_model_from_spec(spec, query, default_model=None):
+def _get_joined_models_1_4(query):  # pragma: no_cover_sqlalchemy_lt_1_4
+    if not query._setup_joins and not query._legacy_setup_joins:
+        # nothing joined, so avoid compiling the query to find out
+        return []
+
+    try:
+        return [mapper.class_ for mapper in query._compile_state()._join_entities]
+    except InvalidRequestError:
+        # query might not contain columns yet, hence cannot be compiled
+        # try to infer the models from various internals
+        models = []
+        for table_tuple in query._setup_joins + query._legacy_setup_joins:
+            model_class = get_model_from_table(table_tuple[0])
+            if model_class:
+                models.append(model_class)
+        return models
+
+
+def _get_select_from_model_1_3(query):  # pragma: no_cover_sqlalchemy_gte_1_4
+    if query._select_from_entity:
+        return (
+            query._select_from_entity if _SA_LT_11 else query._select_from_entity.class_
+        )
+    return None
+
+
+def _get_select_from_model_1_4(query):  # pragma: no_cover_sqlalchemy_lt_1_4
+    if query._from_obj:
+        return get_model_from_table(query._from_obj[0])
+    return None
+
+
+if _IS_SA_14:  # pragma: no_cover_sqlalchemy_lt_1_4
+    _get_joined_models = _get_joined_models_1_4
+    _get_select_from_model = _get_select_from_model_1_4
+else:  # pragma: no_cover_sqlalchemy_gte_1_4
+    _get_joined_models = _get_joined_models_1_3
+    _get_select_from_model = _get_select_from_model_1_3
+
+
+def get_model_from_spec(spec, query, default_model=None, models=None):
     """Determine the model to which a spec applies on a given query.
 
     A spec that does not specify a model may be applied to a query that
@@ -204,6 +312,10 @@ def get_model_from_spec(spec, query, default_model=None):
         A dictionary that may or may not contain a model name to resolve
         against the query.
 
+    :param models:
+        Optional result of :func:`get_query_models` for `query`, to avoid
+        inspecting the query again when resolving many specs.
+
     :returns:
         A model instance.
 
@@ -214,19 +326,19 @@ def get_model_from_spec(spec, query, default_model=None):
         If the query contains no models.
 
     """
-    models = get_query_models(query)
+    if models is None:
+        models = get_query_models(query)
     if not models:
         raise BadQuery("The query does not contain any models.")
 
     model_name = spec.get("model")
     if model_name is not None:
-        models = [v for (k, v) in models.items() if k == model_name]
-        if not models:
+        model = models.get(model_name)
+        if model is None:
             raise BadSpec("The query does not contain model `{}`.".format(model_name))
-        model = models[0]
     else:
         if len(models) == 1:
-            model = list(models.values())[0]
+            model = next(iter(models.values()))
         elif default_model is not None:
             return default_model
         else:
@@ -235,13 +347,14 @@ def get_model_from_spec(spec, query, default_model=None):
     return model
 
 
-def get_default_model(query):
+def get_default_model(query, models=None):
     """Return the singular model from `query`, or `None` if `query` contains
     multiple models.
     """
-    query_models = get_query_models(query).values()
-    if len(query_models) == 1:
-        (default_model,) = iter(query_models)
+    if models is None:
+        models = get_query_models(query)
+    if len(models) == 1:
+        default_model = next(iter(models.values()))
     else:
         default_model = None
     return default_model
@@ -249,21 +362,37 @@ def get_default_model(query):
 
 def auto_join(query, inner_join_relationships, outer_join_relationships):
     """Automatically join models to `query` if they're not already present."""
-    for relationship in outer_join_relationships:
-        query = join_relationship(query, relationship, True)
+    if not inner_join_relationships and not outer_join_relationships:
+        return query
+
+    query_model_classes = _get_query_models_and_set(query)[1]
 
-    for relationship in inner_join_relationships:
-        query = join_relationship(query, relationship, False)
+    # Several specs may refer to the same relationship, visit each one once.
+    for relationship in dict.fromkeys(outer_join_relationships):
+        query = join_relationship(query, relationship, True, query_model_classes)
+
+    for relationship in dict.fromkeys(inner_join_relationships):
+        query = join_relationship(query, relationship, False, query_model_classes)
 
     return query
 
 
-def join_relationship(query, relationship, outer_join=False):
+def join_relationship(query, relationship, outer_join=False, query_model_classes=None):
+    """Join `relationship` to `query` unless its model is already present.
+
+    `query_model_classes` may be given as a set of the model classes in
+    `query`, to avoid inspecting the query again. It is updated with the
+    model of `relationship` when that gets joined.
+    """
     model = relationship.property.entity.class_
-    if model not in get_query_models(query).values():
+    if query_model_classes is None:
+        query_model_classes = _get_query_models_and_set(query)[1]
+    if model not in query_model_classes:
         try:
             query = query.join(relationship, isouter=outer_join)
         except InvalidRequestError:
             pass  # can't be autojoined
+        else:
+            query_model_classes.add(model)
 
     return query
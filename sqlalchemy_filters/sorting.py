@@ -5,8 +5,10 @@ from .models import (
     Field,
     auto_join,
     get_model_from_spec,
-    get_relationship_models,
+    get_model_column,
+    get_query_models,
     should_sort_outer_join_relationship,
+    walk_relationships,
 )
 
 SORT_ASCENDING = "asc"
@@ -32,13 +34,23 @@ class Sort(object):
             raise BadSortFormat("Direction `{}` not valid.".format(direction))
 
         self.field_name = field_name
+        self.field_parts = tuple(field_name.split("."))
         self.direction = direction
         self.nullsfirst = sort_spec.get("nullsfirst")
         self.nullslast = sort_spec.get("nullslast")
+        self._walked = None
+
+    def _walk(self, model):
+        """Return the `(model, relationships, related_model)` of walking the
+        sort field from `model`, reusing the previous walk from the same model.
+        """
+        if self._walked is None or self._walked[0] is not model:
+            relationships, related_model = walk_relationships(model, self.field_parts)
+            self._walked = (model, relationships, related_model)
+        return self._walked
 
     def get_named_models(self, model):
-        field = self.sort_spec["field"]
-        models = get_relationship_models(model, field)
+        _, models, _ = self._walk(model)
 
         return (
             (list(), models)
@@ -46,14 +58,20 @@ class Sort(object):
             else (models, list())
         )
 
-    def format_for_sqlalchemy(self, query, default_model):
+    def format_for_sqlalchemy(self, query, default_model, models=None):
         sort_spec = self.sort_spec
         direction = self.direction
         field_name = self.field_name
 
-        model = get_model_from_spec(sort_spec, query, default_model)
+        model = get_model_from_spec(sort_spec, query, default_model, models)
+        _, _, related_model = self._walk(model)
+        column = (
+            None
+            if related_model is None
+            else get_model_column(related_model, self.field_parts[-1])
+        )
 
-        field = Field(model, field_name)
+        field = Field(model, field_name, column)
         sqlalchemy_field = field.get_sqlalchemy_field()
 
         if direction == SORT_ASCENDING:
@@ -125,7 +143,11 @@ def apply_sort(model, query, sort_spec):
     inner_join_models, outer_join_models = get_named_models(model, sorts)
     query = auto_join(query, inner_join_models, outer_join_models)
 
-    sqlalchemy_sorts = [sort.format_for_sqlalchemy(query, model) for sort in sorts]
+    # Inspect the query once rather than once per sort spec.
+    models = get_query_models(query) if sorts else None
+    sqlalchemy_sorts = [
+        sort.format_for_sqlalchemy(query, model, models) for sort in sorts
+    ]
 
     if sqlalchemy_sorts:
         query = query.order_by(*sqlalchemy_sorts)
@@ -279,6 +279,22 @@ class TestAutoJoin:
         assert result[0].bar_id == 3
         assert result[0].bar.count is None
 
+    @pytest.mark.usefixtures("multiple_foos_inserted")
+    def test_relationship_joined_once(self, session):
+        query = session.query(Foo)
+        filters = [
+            {"field": "bar.name", "op": "==", "value": "name_1"},
+            {"field": "bar.count", "op": "is_not_null"},
+        ]
+
+        filtered_query = apply_filters(Foo, query, filters)
+        result = filtered_query.all()
+
+        assert str(filtered_query).count("JOIN bar") == 1
+        assert len(result) > 0
+        assert all(foo.bar.name == "name_1" for foo in result)
+        assert all(foo.bar.count is not None for foo in result)
+
 
 class TestApplyIsNullFilter:
 
@@ -1,22 +1,47 @@
+import gc
+import weakref
+
 import pytest
-from sqlalchemy import func
-from sqlalchemy.orm import joinedload
+from sqlalchemy import Column, ForeignKey, Integer, String, func
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.inspection import inspect
+from sqlalchemy.orm import joinedload, relationship
 
 from sqlalchemy_filters.exceptions import BadSpec, BadQuery
 from sqlalchemy_filters.models import (
     auto_join,
+    find_nested_relationship_model,
     get_default_model,
     get_query_models,
     get_model_class_by_name,
     get_model_from_spec,
     sqlalchemy_version_lt,
     get_model_from_table,
+    get_nested_column,
+    get_relationship_models,
+    join_relationship,
+    resolve_nested_field,
+    should_sort_outer_join_relationship,
 )
 from test.conftest import is_mysql
 from test.interface.test_filters import SET_NOT_SUPPORTED
 from test.models import Base, Bar, Foo, Qux
 
 
+class TestSqlalchemyVersionLt:
+
+    def test_older_version(self):
+        assert not sqlalchemy_version_lt("1.0")
+
+    def test_newer_version(self):
+        assert sqlalchemy_version_lt("99.0")
+
+    def test_multi_digit_component(self):
+        # compared numerically, so 1.10 is newer than any supported 1.x release
+        assert sqlalchemy_version_lt("1.10")
+
+
 class TestGetQueryModels(object):
     @pytest.mark.skipif(
         sqlalchemy_version_lt("1.4"), reason="tests sqlalchemy 1.4 code"
@@ -31,6 +56,13 @@ class TestGetQueryModels(object):
         result = get_model_from_table(table)
         assert result is None
 
+    @pytest.mark.skipif(
+        sqlalchemy_version_lt("1.4"), reason="tests sqlalchemy 1.4 code"
+    )
+    def test_returns_model_for_table(self):
+        assert get_model_from_table(Foo.__table__) == Foo
+        assert get_model_from_table(Bar.__table__) == Bar
+
     def test_query_with_no_models(self, session):
         query = session.query()
 
@@ -108,6 +140,21 @@ class TestGetQueryModels(object):
 
         assert {"Foo": Foo, "Bar": Bar, "Qux": Qux} == entities
 
+    @pytest.mark.skipif(
+        sqlalchemy_version_lt("1.4"), reason="tests sqlalchemy 1.4 code"
+    )
+    def test_query_without_joins_is_not_compiled(self, session):
+        query = session.query(Foo).filter(Foo.id == 1)
+
+        def _compile_state(*args, **kwargs):
+            raise AssertionError("query should not be compiled")
+
+        query._compile_state = _compile_state
+
+        entities = get_query_models(query)
+
+        assert {"Foo": Foo} == entities
+
     def test_query_with_joinedload(self, session):
         query = session.query(Foo).options(joinedload(Foo.bar))
 
@@ -153,6 +200,167 @@ class TestGetModelFromSpec:
 
         assert "Ambiguous spec. Please specify a model." == err.value.args[0]
 
+    def test_precomputed_query_models(self, session):
+        query = session.query(Bar)
+        spec = {"model": "Qux"}
+
+        # the given models are used instead of inspecting the query
+        model = get_model_from_spec(spec, query, models={"Qux": Qux})
+        assert model == Qux
+
+
+def dynamic_models():
+    """Declare a child/parent mapping on a throwaway declarative base."""
+    DynamicBase = declarative_base()
+
+    class Parent(DynamicBase):
+        __tablename__ = "parent"
+        id = Column(Integer, primary_key=True)
+
+    class Child(DynamicBase):
+        __tablename__ = "child"
+        id = Column(Integer, primary_key=True)
+        parent_id = Column(Integer, ForeignKey("parent.id"), nullable=True)
+        parent = relationship(Parent)
+
+    return Parent, Child
+
+
+def assert_collected(refs):
+    gc.collect()
+    assert [ref() for ref in refs] == [None] * len(refs)
+
+
+class TestGetNestedColumn:
+
+    def test_own_column(self):
+        assert get_nested_column(Foo, "name") is Foo.name
+
+    def test_hybrid_property(self):
+        assert str(get_nested_column(Foo, "count_square")) == str(Foo.count_square)
+
+    def test_nested_column(self):
+        assert get_nested_column(Foo, "bar.name") is Bar.name
+
+    def test_deeply_nested_column(self):
+        assert get_nested_column(Foo, "bar.foos.bar.name") is Bar.name
+
+    def test_missing_column(self):
+        assert get_nested_column(Foo, "missing") is None
+
+    def test_missing_relationship(self):
+        assert get_nested_column(Foo, "missing.name") is None
+
+    def test_relationship_is_not_a_column(self):
+        assert get_nested_column(Foo, "bar") is None
+
+    def test_column_added_after_lookup(self):
+        _, child = dynamic_models()
+        assert get_nested_column(child, "late") is None
+
+        child.late = Column(String(50))
+        assert get_nested_column(child, "late") is child.late
+
+    def test_hybrid_added_after_lookup(self):
+        _, child = dynamic_models()
+        assert get_nested_column(child, "double_id") is None
+
+        def double_id(self):
+            return self.id * 2
+
+        child.double_id = hybrid_property(double_id)
+        assert str(get_nested_column(child, "double_id")) == str(child.double_id)
+
+    def test_dynamic_models_can_be_collected(self):
+        parent, child = dynamic_models()
+        assert get_nested_column(child, "parent.id") is parent.id
+        # not a column, so the hybrid attributes are looked up as well
+        assert get_nested_column(child, "missing") is None
+
+        refs = [weakref.ref(parent), weakref.ref(child)]
+        del parent, child
+        assert_collected(refs)
+
+
+class TestGetRelationshipModels:
+
+    def test_own_column(self):
+        assert get_relationship_models(Foo, "name") == []
+
+    def test_nested_column(self):
+        assert get_relationship_models(Foo, "bar.name") == [Foo.bar]
+
+    def test_deeply_nested_column(self):
+        assert get_relationship_models(Foo, "bar.foos.name") == [Foo.bar, Bar.foos]
+
+    def test_pre_split_field(self):
+        assert get_relationship_models(Foo, ("bar", "name")) == [Foo.bar]
+
+    def test_stops_at_missing_relationship(self):
+        assert get_relationship_models(Foo, "bar.missing.name") == [Foo.bar]
+
+
+class TestFindNestedRelationshipModel:
+
+    def test_dotted_path(self):
+        relationship = find_nested_relationship_model(inspect(Foo), "bar.foos")
+        assert relationship is Bar.foos.property
+
+    def test_pre_split_path(self):
+        assert find_nested_relationship_model(inspect(Foo), ["bar"]) is (
+            Foo.bar.property
+        )
+        assert find_nested_relationship_model(inspect(Foo), ("bar", "foos")) is (
+            Bar.foos.property
+        )
+
+    def test_missing_relationship(self):
+        assert find_nested_relationship_model(inspect(Foo), "bar.missing") is None
+
+    def test_column_is_not_a_relationship(self):
+        assert find_nested_relationship_model(inspect(Foo), "bar.name") is None
+
+
+class TestResolveNestedField:
+
+    def test_own_column(self):
+        assert resolve_nested_field(Foo, "name") == ([], Foo.name)
+
+    def test_nested_column(self):
+        relationships, column = resolve_nested_field(Foo, "bar.foos.name")
+
+        assert relationships == [Foo.bar, Bar.foos]
+        assert column is Foo.name
+
+    def test_missing_column(self):
+        relationships, column = resolve_nested_field(Foo, "bar.missing")
+
+        assert relationships == [Foo.bar]
+        assert column is None
+
+
+class TestShouldSortOuterJoinRelationship:
+
+    def test_nullable_foreign_key(self):
+        assert should_sort_outer_join_relationship([Foo.bar])
+
+    def test_one_to_many(self):
+        assert should_sort_outer_join_relationship([Bar.foos])
+
+    def test_no_relationships(self):
+        assert not should_sort_outer_join_relationship([])
+
+    def test_dynamic_models_can_be_collected(self):
+        parent, child = dynamic_models()
+        relationships = get_relationship_models(child, "parent.id")
+        assert should_sort_outer_join_relationship(relationships)
+
+        del relationships
+
+        refs = [weakref.ref(parent), weakref.ref(child)]
+        del parent, child
+        assert_collected(refs)
+
 
 class TestGetModelClassByName:
 
@@ -185,6 +393,36 @@ class TestGetDefaultModel:
         query = session.query()
         assert get_default_model(query) is None
 
+    def test_precomputed_query_models(self, session):
+        query = session.query(Foo, Bar)
+        assert get_default_model(query, {"Foo": Foo}) == Foo
+
+
+class TestJoinRelationship:
+
+    def test_model_not_present(self, session, db_uri):
+        query = join_relationship(session.query(Foo), Foo.bar)
+
+        join_type = "INNER JOIN" if "mysql" in db_uri else "JOIN"
+
+        expected = (
+            "SELECT "
+            "foo.id AS foo_id, foo.name AS foo_name, "
+            "foo.count AS foo_count, foo.bar_id AS foo_bar_id \n"
+            "FROM foo {join} bar ON bar.id = foo.bar_id".format(join=join_type)
+        )
+        assert str(query) == expected
+
+    def test_model_already_present(self, session):
+        query = session.query(Foo, Bar)
+        assert join_relationship(query, Foo.bar) is query
+
+    def test_query_model_classes_are_updated(self, session):
+        query_model_classes = {Foo}
+        join_relationship(session.query(Foo), Foo.bar, False, query_model_classes)
+
+        assert query_model_classes == {Foo, Bar}
+
 
 class TestAutoJoin:
 
@@ -234,6 +472,24 @@ class TestAutoJoin:
         query = auto_join(query, [Foo.bar], [])
         assert str(query) == expected  # no change
 
+    def test_model_joined_once(self, session, db_uri):
+        query = session.query(Foo)
+        query = auto_join(query, [Foo.bar, Foo.bar], [])
+
+        join_type = "INNER JOIN" if "mysql" in db_uri else "JOIN"
+
+        expected = (
+            "SELECT "
+            "foo.id AS foo_id, foo.name AS foo_name, "
+            "foo.count AS foo_count, foo.bar_id AS foo_bar_id \n"
+            "FROM foo {join} bar ON bar.id = foo.bar_id".format(join=join_type)
+        )
+        assert str(query) == expected
+
+    def test_no_relationships(self, session):
+        query = session.query(Foo)
+        assert auto_join(query, [], []) is query
+
     def test_model_eager_joined(self, session, db_uri):
         query = session.query(Foo).options(joinedload(Foo.bar))
 
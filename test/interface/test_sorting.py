@@ -4,6 +4,9 @@ import datetime
 
 import pytest
 
+from sqlalchemy import Column, Integer, String
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import joinedload
 from sqlalchemy_filters.exceptions import BadSortFormat, BadSpec, FieldNotFound
 from sqlalchemy_filters.sorting import apply_sort
@@ -404,6 +407,21 @@ class TestAutoJoin:
             (1, "name_4", 4),
         ]
 
+    @pytest.mark.usefixtures(
+        "multiple_bars_with_no_nulls_inserted", "multiple_foos_inserted"
+    )
+    def test_relationship_joined_once(self, session):
+        query = session.query(Foo)
+        order_by = [
+            {"field": "bar.name", "direction": "asc"},
+            {"field": "bar.id", "direction": "asc"},
+        ]
+
+        sorted_query = apply_sort(Foo, query, order_by)
+
+        assert str(sorted_query).count("JOIN bar") == 1
+        assert len(sorted_query.all()) == 8
+
 
 class TestSortNullsFirst(object):
     """Tests `nullsfirst`.
@@ -699,3 +717,28 @@ class TestSortHybridAttributes(object):
             6,
             3,
         ]
+
+    def test_named_model_field_matching_base_model_hybrid(self, session):
+        DynamicBase = declarative_base()
+
+        class Label(DynamicBase):
+            __tablename__ = "label"
+            id = Column(Integer, primary_key=True)
+            label = Column(String(50))
+
+        class Labelled(DynamicBase):
+            __tablename__ = "labelled"
+            id = Column(Integer, primary_key=True)
+            title = Column(String(50))
+
+            # only usable on instances, raises AttributeError on the class
+            @hybrid_property
+            def label(self):
+                return self.title.upper()
+
+        query = session.query(Labelled, Label)
+        order_by = [{"model": "Label", "field": "label", "direction": "asc"}]
+
+        sorted_query = apply_sort(Labelled, query, order_by)
+
+        assert str(sorted_query).endswith("ORDER BY label.label ASC")